@@ -71,9 +71,15 @@ def build_executable():
 
     # 添加隐藏导入（如果需要）
     hidden_imports = [
+        "aiohttp",
+        "aiohttp_socks",
+        "brotli",
         "bs4",
         "dotenv",
+        "lxml",
+        "orjson",
         "requests",
+        "selectolax",
     ]
     for module in hidden_imports:
         cmd.extend(["--hidden-import", module])
@@ -1,4 +1,5 @@
 import argparse
+import asyncio
 import csv
 import json
 import os
@@ -7,11 +8,51 @@ import re
 import time
 from dataclasses import dataclass
 from datetime import datetime
+from operator import attrgetter
 from typing import Optional
 
+import aiohttp
 import requests
-from bs4 import BeautifulSoup
+from aiohttp_socks import ProxyConnector
+from bs4 import BeautifulSoup, SoupStrainer
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter
+from selectolax.lexbor import LexborHTMLParser
+from urllib3.util.retry import Retry
+
+try:
+    import lxml  # noqa: F401
+
+    # lxml 基于 C 实现，解析速度远快于内置的 html.parser
+    HTML_PARSER = "lxml"
+except ImportError:
+    HTML_PARSER = "html.parser"
+
+try:
+    import orjson
+
+    # orjson 的解码速度明显快于标准库 json
+    # orjson.JSONDecodeError 是 json.JSONDecodeError 的子类，异常处理无需区分
+    _json_loads = orjson.loads
+except ImportError:
+    _json_loads = json.loads
+
+# 匹配 "读过(4916)" 这样的评论数格式
+_COUNT_RE = re.compile(r"(读过|在读|想读)\((\d+)\)")
+# 文件名中不合法的字符
+_INVALID_FN_RE = re.compile(r'[<>:"/\\|?*]')
+# 匹配多值 class 中的 CommentTabs
+_COMMENT_TABS_CLASS_RE = re.compile(r"\bCommentTabs\b")
+
+# 评论页使用的 CSS 选择器，每个字段一次查询即可定位
+_SEL_ITEMS = "li.comment-item"
+_SEL_USER = "span.comment-info a:not(.comment-time)"
+_SEL_RATING = "span.rating"
+# 必须先从 p.comment-content 找到，再找里面的 span.short，避免爬错到日期
+_SEL_CONTENT = "p.comment-content span.short"
+_SEL_TIME = "a.comment-time"
+_SEL_LOCATION = "span.comment-location"
+_SEL_VOTE = "span.vote-count"
 
 
 @dataclass
@@ -23,6 +64,23 @@ class BookInfo:
     subject_id: str
 
 
+@dataclass(slots=True)
+class Comment:
+    """单条评论"""
+
+    comment_id: str
+    user: str = ""
+    user_url: str = ""
+    # 星级（1.0-5.0），没有评分时为 "无"
+    rating: float | str = "无"
+    content: str = ""
+    time: str = ""
+    comment_url: str = ""
+    location: str = ""
+    # 有用数，页面上缺失时为空字符串
+    vote_count: int | str = ""
+
+
 class DoubanCommentCrawler:
     """豆瓣读书评论区爬虫"""
 
@@ -32,84 +90,166 @@ class DoubanCommentCrawler:
         "User-Agent": "Mozilla/5.0 (Macintosh; Intel Mac OS X 10_15_7) AppleWebKit/537.36 (KHTML, like Gecko) Chrome/143.0.0.0 Safari/537.36 Edg/143.0.0.0",
         "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",
         "Accept-Language": "zh-CN,zh;q=0.9,en;q=0.8",
-        "Accept-Encoding": "gzip, deflate",
+        "Accept-Encoding": "gzip, deflate, br",
         "Connection": "keep-alive",
     }
 
+    # 并发抓取评论页的上限，避免触发豆瓣限流
+    MAX_CONCURRENCY = 8
+    # aiohttp 连接池的总连接数上限（对同一主机仍受 MAX_CONCURRENCY 限制）
+    MAX_CONNECTIONS = 32
+    # 单个请求失败后的最大尝试次数
+    MAX_RETRIES = 3
+    # 需要退避重试的状态码（限流 / 服务暂不可用）
+    RETRY_STATUS_CODES = (429, 503)
+    # 指数退避的基准秒数与随机抖动上限
+    BACKOFF_BASE = 1.0
+    BACKOFF_JITTER = 1.0
+
     def __init__(self):
         load_dotenv()
         self.cookies = self._load_cookies()
+        self._cookie_dict = (
+            self._parse_cookie_string(self.cookies) if self.cookies else {}
+        )
         self.output_dir = self._load_output_dir()
+        self.min_interval = self._load_min_interval()
+        self._last_request = 0.0
+        # 异步请求使用令牌桶：至多并发 MAX_CONCURRENCY 个请求，之后按 min_interval 补充令牌
+        self._async_tokens = float(self.MAX_CONCURRENCY)
+        self._async_refilled_at = time.monotonic()
+        self._throttle_lock = asyncio.Lock()
+        # 书籍信息和评论总数在一次运行中不会变化，按 subject_id 缓存
+        self._book_info_cache: dict[str, BookInfo] = {}
+        self._comment_counts_cache: dict[str, dict[str, int]] = {}
         self.session = self._init_session()
 
     def _load_cookies(self) -> Optional[str]:
         return os.getenv("DOUBAN_COOKIES")
 
+    @staticmethod
+    def _parse_cookie_string(cookies: str) -> dict[str, str]:
+        """将 cookie 字符串解析为字典
+
+        Args:
+            cookies: cookie 字符串，格式如 "name1=value1; name2=value2"，
+                如果只是单个值，假设是 dbcl2
+
+        Returns:
+            cookie 名到值的字典
+        """
+        if "=" not in cookies and ";" not in cookies:
+            return {"dbcl2": cookies}
+
+        cookie_dict = {}
+        for part in cookies.split(";"):
+            key, sep, value = part.partition("=")
+            if sep:
+                cookie_dict[key.strip()] = value.strip()
+        return cookie_dict
+
     def _extract_ck_from_cookies(self) -> Optional[str]:
         """从 cookies 中提取 ck 值
 
         Returns:
             ck 值，如果不存在则返回 None
         """
-        # 首先尝试从 session cookies 中获取（最可靠）
-        if hasattr(self, "session") and self.session:
-            ck_cookie = self.session.cookies.get("ck")
-            if ck_cookie:
-                return ck_cookie
-
-        # 如果 session 中没有，尝试从环境变量的 cookies 字符串中解析
-        if not self.cookies:
-            return None
-
-        # cookies 可能是 cookie 字符串，格式如 "name1=value1; name2=value2"
-        if "=" in self.cookies or ";" in self.cookies:
-            # 解析 cookie 字符串
-            cookie_parts = self.cookies.split(";")
-            for part in cookie_parts:
-                part = part.strip()
-                if "=" in part:
-                    key, value = part.split("=", 1)
-                    key = key.strip()
-                    value = value.strip()
-                    if key == "ck":
-                        return value
-
-        return None
+        # 首先尝试从 session cookies 中获取（最可靠），其次使用环境变量中解析出的值
+        return self.session.cookies.get("ck") or self._cookie_dict.get("ck")
 
     def _load_output_dir(self) -> str:
         """加载输出文件夹，默认为 ./output"""
         return os.getenv("OUTPUT_DIR", "./output")
 
+    def _load_min_interval(self) -> float:
+        """加载两次请求之间的最小间隔（秒），默认为 1.0"""
+        return float(os.getenv("REQUEST_MIN_INTERVAL", "1.0"))
+
     def _init_session(self) -> requests.Session:
         session = requests.Session()
         session.headers.update(self.DEFAULT_HEADERS)
-        if self.cookies:
-            # 如果 cookies 是完整的 cookie 字符串，解析并设置所有 cookies
-            if "=" in self.cookies or ";" in self.cookies:
-                # 解析 cookie 字符串，格式如 "name1=value1; name2=value2"
-                cookie_parts = self.cookies.split(";")
-                for part in cookie_parts:
-                    part = part.strip()
-                    if "=" in part:
-                        key, value = part.split("=", 1)
-                        key = key.strip()
-                        value = value.strip()
-                        session.cookies.set(key, value)
-            else:
-                # 如果只是单个值，假设是 dbcl2
-                session.cookies.set("dbcl2", self.cookies)
+
+        # 所有请求都发往 book.douban.com，使用足够大的连接池复用 keep-alive 连接
+        # urllib3 只重试连接/读取错误和 5xx，限流（429/503）由 get() 的退避逻辑处理
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=32,
+            max_retries=Retry(
+                total=3,
+                backoff_factor=0.5,
+                status_forcelist=[500, 502, 504],
+                allowed_methods=["GET"],
+                raise_on_status=False,
+                # 否则带 Retry-After 的 429/503 仍会在 urllib3 内部被重试
+                respect_retry_after_header=False,
+            ),
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+
+        for key, value in self._cookie_dict.items():
+            session.cookies.set(key, value)
         return session
 
-    def get(self, url: str, **kwargs) -> requests.Response:
-        response = self.session.get(url, **kwargs)
-        # 确保正确设置编码
-        if response.encoding is None or response.encoding == "ISO-8859-1":
-            # requests 默认使用 ISO-8859-1，但豆瓣使用 UTF-8
-            response.encoding = "utf-8"
+    def _backoff_delay(self, attempt: int, retry_after: str | None = None) -> float:
+        """计算第 attempt 次失败后的等待时间
 
-        # 总限流器：每次请求后随机等待 0.5-2 秒
-        delay = random.uniform(0.5, 2.0)
-        time.sleep(delay)
+        Args:
+            attempt: 已失败的次数（从 0 开始）
+            retry_after: 响应中的 Retry-After 头
+
+        Returns:
+            等待秒数，优先使用 Retry-After，否则使用带抖动的指数退避
+        """
+        if retry_after:
+            try:
+                return max(0.0, float(retry_after))
+            except ValueError:
+                pass
+        return self.BACKOFF_BASE * 2**attempt + random.random() * self.BACKOFF_JITTER
+
+    async def _async_throttle(self) -> None:
+        """异步请求的令牌桶限流器，允许 MAX_CONCURRENCY 个请求同时发出"""
+        if self.min_interval <= 0:
+            return
+        async with self._throttle_lock:
+            while True:
+                now = time.monotonic()
+                self._async_tokens = min(
+                    float(self.MAX_CONCURRENCY),
+                    self._async_tokens
+                    + (now - self._async_refilled_at) / self.min_interval,
+                )
+                self._async_refilled_at = now
+                if self._async_tokens >= 1:
+                    self._async_tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._async_tokens) * self.min_interval)
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        for attempt in range(self.MAX_RETRIES):
+            # 限流器：距离上次请求不足 min_interval 时才等待
+            delay = self.min_interval - (time.monotonic() - self._last_request)
+            if delay > 0:
+                time.sleep(delay)
+            self._last_request = time.monotonic()
+
+            is_last_attempt = attempt == self.MAX_RETRIES - 1
+            try:
+                response = self.session.get(url, **kwargs)
+            except requests.exceptions.RequestException:
+                if is_last_attempt:
+                    raise
+                time.sleep(self._backoff_delay(attempt))
+                continue
+
+            # 被限流或服务暂不可用时退避重试
+            if response.status_code in self.RETRY_STATUS_CODES and not is_last_attempt:
+                time.sleep(
+                    self._backoff_delay(attempt, response.headers.get("Retry-After"))
+                )
+                continue
+            break
 
         return response
 
@@ -117,7 +257,7 @@ class DoubanCommentCrawler:
         return self.session.post(url, **kwargs)
 
     def fetch_book_info(self, subject_id: str) -> BookInfo:
-        """获取书籍基本信息
+        """获取书籍基本信息（按 subject_id 缓存）
 
         Args:
             subject_id: 书籍 subject-id
@@ -125,11 +265,18 @@ class DoubanCommentCrawler:
         Returns:
             BookInfo 对象
         """
+        cached = self._book_info_cache.get(subject_id)
+        if cached is not None:
+            return cached
+
         url = f"{self.BASE_URL}/subject/{subject_id}/"
         response = self.get(url)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        # 只需要 JSON-LD script 和 meta 标签，跳过其余节点的构建
+        strainer = SoupStrainer(["script", "meta"])
+        # 直接传入原始字节，由解析器根据 <meta charset> 解码
+        soup = BeautifulSoup(response.content, HTML_PARSER, parse_only=strainer)
 
         # 从 JSON-LD 中提取书名和作者
         title = ""
@@ -139,7 +286,8 @@ class DoubanCommentCrawler:
         json_ld_script = soup.find("script", type="application/ld+json")
         if json_ld_script:
             try:
-                data = json.loads(json_ld_script.string)
+                # orjson 不接受 str 的子类，需先将 NavigableString 转为 str
+                data = _json_loads(str(json_ld_script.string))
                 title = data.get("name", "")
                 authors = data.get("author", [])
                 if authors and isinstance(authors, list) and len(authors) > 0:
@@ -158,10 +306,12 @@ class DoubanCommentCrawler:
             if book_author:
                 author = book_author.get("content", "")
 
-        return BookInfo(title=title, author=author, subject_id=subject_id)
+        book_info = BookInfo(title=title, author=author, subject_id=subject_id)
+        self._book_info_cache[subject_id] = book_info
+        return book_info
 
     def fetch_comment_counts(self, subject_id: str) -> dict[str, int]:
-        """获取三类评论总数
+        """获取三类评论总数（按 subject_id 缓存）
 
         Args:
             subject_id: 书籍 subject-id
@@ -169,61 +319,72 @@ class DoubanCommentCrawler:
         Returns:
             字典，键为 status（P/N/F），值为评论数量
         """
+        # 返回副本，避免调用方修改缓存内容
+        cached = self._comment_counts_cache.get(subject_id)
+        if cached is not None:
+            return dict(cached)
+
         url = f"{self.BASE_URL}/subject/{subject_id}/comments/"
         response = self.get(url)
         response.raise_for_status()
 
-        soup = BeautifulSoup(response.text, "html.parser")
+        # 只解析评论标签（li.CommentTabs 或 ul.CommentTabs 及其子节点）
+        # 解析阶段 class 尚未按空格拆分，需用正则匹配多值 class
+        strainer = SoupStrainer(["ul", "li"], class_=_COMMENT_TABS_CLASS_RE)
+        soup = BeautifulSoup(response.content, HTML_PARSER, parse_only=strainer)
         counts = {}
 
-        # 查找评论标签
-        comment_tabs = soup.find_all("li", class_="CommentTabs")
-        if not comment_tabs:
-            # 尝试另一种选择器
-            comment_tabs = soup.select("ul.CommentTabs li")
+        # 经过 strainer 后 soup 中只剩评论标签，一次取出全部文本并扫描
+        # 匹配 "读过(4916)" 这样的格式，并映射到 status
+        status_map = {"读过": "P", "在读": "N", "想读": "F"}
+        for match in _COUNT_RE.finditer(soup.get_text("|")):
+            counts[status_map[match.group(1)]] = int(match.group(2))
 
-        for tab in comment_tabs:
-            text = tab.get_text()
-            # 匹配 "读过(4916)" 这样的格式
-            match = re.search(r"(读过|在读|想读)\((\d+)\)", text)
-            if match:
-                comment_type = match.group(1)
-                count = int(match.group(2))
-
-                # 映射到 status
-                status_map = {"读过": "P", "在读": "N", "想读": "F"}
-                status = status_map.get(comment_type)
-                if status:
-                    counts[status] = count
-
-        return counts
+        self._comment_counts_cache[subject_id] = counts
+        return dict(counts)
 
     def build_comment_url(
-        self, subject_id: str, page: int = 1, status: str = "P"
+        self,
+        subject_id: str,
+        start: int = 0,
+        status: str = "P",
+        ck_param: str | None = None,
     ) -> str:
         """构建评论页面 URL（使用 comments_only=1 API）
 
         Args:
             subject_id: 书籍 subject-id
-            page: 页码（从1开始）
+            start: 评论起始偏移（第一页为 0）
             status: 评论状态，P=读过，N=在读，F=想读
+            ck_param: 预先计算好的 "&ck=..." 参数，为空时从 cookies 中提取
 
         Returns:
             完整的评论页面 URL
         """
-        base_url = f"{self.BASE_URL}/subject/{subject_id}/comments/"
-
         # 如果已登录，添加 ck 参数
-        ck_value = self._extract_ck_from_cookies()
-        ck_param = f"&ck={ck_value}" if ck_value else ""
+        if ck_param is None:
+            ck_value = self._extract_ck_from_cookies()
+            ck_param = f"&ck={ck_value}" if ck_value else ""
 
-        if page == 1:
-            # 第一页不需要 start 参数
-            return f"{base_url}?percent_type=&limit=20&status={status}&sort=score&comments_only=1{ck_param}"
-        else:
-            # 从第二页开始，start = (page - 1) * 20
-            start = (page - 1) * 20
-            return f"{base_url}?percent_type=&start={start}&limit=20&status={status}&sort=score&comments_only=1{ck_param}"
+        # 第一页不需要 start 参数
+        start_param = f"start={start}&" if start else ""
+        return f"{self.BASE_URL}/subject/{subject_id}/comments/?percent_type=&{start_param}limit=20&status={status}&sort=score&comments_only=1{ck_param}"
+
+    def build_comment_referer(
+        self, subject_id: str, start: int = 0, status: str = "P"
+    ) -> str:
+        """构建请求评论页时使用的 Referer（对应的普通评论页面）
+
+        Args:
+            subject_id: 书籍 subject-id
+            start: 评论起始偏移（第一页为 0）
+            status: 评论状态，P=读过，N=在读，F=想读
+
+        Returns:
+            Referer URL
+        """
+        start_param = f"start={start}&" if start else ""
+        return f"{self.BASE_URL}/subject/{subject_id}/comments/?{start_param}limit=20&status={status}&sort=score"
 
     def fetch_comments_page(
         self, subject_id: str, page: int = 1, status: str = "P"
@@ -238,214 +399,315 @@ class DoubanCommentCrawler:
         Returns:
             JSON 响应字典，包含 r 和 html 字段
         """
-        url = self.build_comment_url(subject_id, page, status)
+        # 从第二页开始，start = (page - 1) * 20
+        start = (page - 1) * 20
+        url = self.build_comment_url(subject_id, start, status)
         print(url)
-        # 构建 referer
-        if page == 1:
-            referer = f"{self.BASE_URL}/subject/{subject_id}/comments/?limit=20&status={status}&sort=score"
-        else:
-            start = (page - 1) * 20
-            referer = f"{self.BASE_URL}/subject/{subject_id}/comments/?start={start}&limit=20&status={status}&sort=score"
-
-        headers = self.DEFAULT_HEADERS.copy()
-        headers["Referer"] = referer
+        referer = self.build_comment_referer(subject_id, start, status)
 
-        response = self.get(url, headers=headers)
+        response = self.get(url, headers={"Referer": referer})
         response.raise_for_status()
-        return response.json()
+        return _json_loads(response.content)
 
-    def parse_comments_from_html(self, html_content: str) -> list[dict]:
-        """使用 BeautifulSoup 解析 HTML 中的评论
+    def parse_comments_from_html(self, html_content: str) -> list[Comment]:
+        """使用 selectolax（Lexbor 引擎）解析 HTML 中的评论
 
         Args:
             html_content: HTML 内容字符串
 
         Returns:
-            评论列表，每个评论是一个字典
+            Comment 对象列表
         """
-        soup = BeautifulSoup(html_content, "html.parser")
+        tree = LexborHTMLParser(html_content)
         comments = []
 
         # 查找评论列表
-        comment_items = soup.find_all("li", class_="comment-item")
-
-        for item in comment_items:
-            comment_data = {}
-
+        for item in tree.css(_SEL_ITEMS):
             # 提取评论 ID（从 li 标签的 data-cid 属性）
-            comment_id = item.get("data-cid", "")
+            comment_id = item.attributes.get("data-cid") or ""
             if not comment_id:
                 continue  # 没有评论 ID 则跳过
-            comment_data["comment_id"] = comment_id
-
-            # 提取用户信息：从 span.comment-info 中的第一个 a 标签（排除 comment-time）
-            comment_info = item.find("span", class_="comment-info")
-            if comment_info:
-                # 找到 comment-info 中的所有 a 标签，排除 comment-time 类的
-                all_links = comment_info.find_all("a")
-                for link in all_links:
-                    # 用户名链接没有 class 或 class 不包含 comment-time
-                    link_class = link.get("class", [])
-                    if "comment-time" not in link_class:
-                        comment_data["user"] = link.get_text(strip=True)
-                        comment_data["user_url"] = link.get("href", "")
-                        break
 
-            # 提取评分：从 span.rating 的 class 中提取 allstarXX
-            rating_elem = item.find("span", class_="rating")
-            rating_value = None
+            # 提取用户信息：span.comment-info 中第一个不是 comment-time 的 a 标签
+            user = user_url = ""
+            user_link = item.css_first(_SEL_USER)
+            if user_link:
+                user = user_link.text(strip=True)
+                user_url = user_link.attributes.get("href") or ""
+
+            # 提取评分：从 span.rating 的 class 中提取 allstarXX，没有评分记为 "无"
+            rating_value = "无"
+            rating_elem = item.css_first(_SEL_RATING)
             if rating_elem:
                 # 从 class 中提取星级（allstar10, allstar20, allstar30, allstar40, allstar50）
-                rating_class = rating_elem.get("class", [])
-                for cls in rating_class:
-                    if cls.startswith("allstar"):
-                        # 去除 "allstar" 前缀，获取数字部分
-                        star_num_str = cls.replace("allstar", "")
-                        try:
-                            # 将数字除以 10 得到星级（10->1, 20->2, ..., 50->5）
-                            rating_value = int(star_num_str) / 10
-                        except ValueError:
-                            pass
-                        break
-            comment_data["rating"] = rating_value if rating_value is not None else "无"
+                rating_class = (rating_elem.attributes.get("class") or "").split()
+                token = next((c for c in rating_class if c.startswith("allstar")), None)
+                # 去除 "allstar" 前缀后除以 10 得到星级（10->1, 20->2, ..., 50->5）
+                if token and token[7:].isdigit():
+                    rating_value = int(token[7:]) / 10
 
             # 提取评论内容：从 p.comment-content 中的 span.short
-            # 必须先从 p.comment-content 找到，再找里面的 span.short，避免爬错到日期
-            comment_content_p = item.find("p", class_="comment-content")
-            if comment_content_p:
-                short_span = comment_content_p.find("span", class_="short")
-                if short_span:
-                    comment_data["content"] = short_span.get_text(strip=True)
-                else:
-                    # 如果没有 span.short，可能是空评论
-                    comment_data["content"] = ""
-            else:
-                comment_data["content"] = ""
+            short_span = item.css_first(_SEL_CONTENT)
+            # 如果没有 span.short，可能是空评论
+            content = short_span.text(strip=True) if short_span else ""
 
             # 提取时间：从 a.comment-time 标签
-            time_elem = item.find("a", class_="comment-time")
+            time_text = comment_url = ""
+            time_elem = item.css_first(_SEL_TIME)
             if time_elem:
-                comment_data["time"] = time_elem.get_text(strip=True)
-                comment_data["comment_url"] = time_elem.get("href", "")
+                time_text = time_elem.text(strip=True)
+                comment_url = time_elem.attributes.get("href") or ""
 
             # 提取地点：从 span.comment-location
-            location_elem = item.find("span", class_="comment-location")
-            if location_elem:
-                location_text = location_elem.get_text(strip=True)
-                if location_text:
-                    comment_data["location"] = location_text
-
-            # 提取有用数：从 span.vote-count
-            vote_count_elem = item.find("span", class_="vote-count")
+            location_elem = item.css_first(_SEL_LOCATION)
+            location_text = location_elem.text(strip=True) if location_elem else ""
+
+            # 提取有用数：从 span.vote-count，缺失时留空，无法解析时记为 0
+            vote_count = ""
+            vote_count_elem = item.css_first(_SEL_VOTE)
             if vote_count_elem:
                 try:
-                    comment_data["vote_count"] = int(
-                        vote_count_elem.get_text(strip=True)
-                    )
+                    vote_count = int(vote_count_elem.text(strip=True))
                 except ValueError:
-                    comment_data["vote_count"] = 0
-
-            comments.append(comment_data)
+                    vote_count = 0
+
+            # 所有字段就绪后一次性构建评论对象
+            comments.append(
+                Comment(
+                    comment_id=comment_id,
+                    user=user,
+                    user_url=user_url,
+                    rating=rating_value,
+                    content=content,
+                    time=time_text,
+                    comment_url=comment_url,
+                    location=location_text,
+                    vote_count=vote_count,
+                )
+            )
 
         return comments
 
-    def crawl_comments(
-        self, subject_id: str, status: str = "P", max_comments: int = 100
-    ) -> list[dict]:
-        """爬取评论，最多爬取指定数量
+    async def _fetch_comments_json(
+        self,
+        session: aiohttp.ClientSession,
+        url: str,
+        referer: str,
+        start: int,
+    ) -> dict | None:
+        """异步获取指定 start 的评论页 JSON，失败时重试
+
+        Args:
+            session: 共享的 aiohttp 会话
+            url: 评论页 URL
+            referer: 请求使用的 Referer
+            start: 评论起始偏移（用于显示）
+
+        Returns:
+            JSON 响应字典，包含 r 和 html 字段；重试耗尽或遇到其余 4xx 时返回 None
+        """
+        page = start // 20 + 1
+        # 会话已带有 DEFAULT_HEADERS，只需补充 Referer
+        headers = {"Referer": referer}
+
+        for attempt in range(self.MAX_RETRIES):
+            await self._async_throttle()
+
+            retry_after = None
+            try:
+                async with session.get(url, headers=headers) as response:
+                    if response.status not in self.RETRY_STATUS_CODES:
+                        response.raise_for_status()
+                        return _json_loads(await response.read())
+                    # 被限流或服务暂不可用，按 Retry-After 或指数退避重试
+                    retry_after = response.headers.get("Retry-After")
+                    error = f"HTTP {response.status}"
+            except aiohttp.ClientResponseError as e:
+                # 其余 4xx（如 403/404）重试也无济于事，直接放弃
+                if e.status < 500:
+                    print(f"获取第 {page} 页（start={start}）失败，不再重试: {e}")
+                    return None
+                error = e
+            except (TimeoutError, aiohttp.ClientError, ValueError) as e:
+                error = e
+
+            print(
+                f"获取第 {page} 页（start={start}）时出错（第 {attempt + 1} 次）: {error}"
+            )
+            if attempt < self.MAX_RETRIES - 1:
+                await asyncio.sleep(self._backoff_delay(attempt, retry_after))
+
+        return None
+
+    def _create_connector(self) -> tuple[aiohttp.BaseConnector, bool]:
+        """根据环境变量中的代理创建 aiohttp 连接器
+
+        aiohttp 的 trust_env 只支持 HTTP 代理，SOCKS 代理（与 requests[socks] 一致）
+        需要通过 aiohttp-socks 的 ProxyConnector 接入。
+
+        Returns:
+            (连接器, 是否仍需 trust_env 读取 HTTP 代理)
+        """
+        limits = {"limit": self.MAX_CONNECTIONS, "limit_per_host": self.MAX_CONCURRENCY}
+        proxies = requests.utils.get_environ_proxies(self.BASE_URL)
+        proxy = requests.utils.select_proxy(self.BASE_URL, proxies)
+        if proxy and proxy.startswith("socks"):
+            # socks5h / socks4a 表示由代理服务器解析域名，aiohttp-socks 用 rdns 表示
+            scheme = proxy.split("://", 1)[0]
+            rdns = scheme in ("socks5h", "socks4a")
+            url = scheme[:6] + proxy[len(scheme) :]
+            return ProxyConnector.from_url(url, rdns=rdns, **limits), False
+        return aiohttp.TCPConnector(**limits), True
+
+    def create_async_session(self) -> aiohttp.ClientSession:
+        """创建用于抓取评论页的 aiohttp 会话
+
+        多个 crawl_comments 共用同一个会话时，共享连接池并受同一并发上限约束。
+
+        Returns:
+            携带默认请求头和当前 cookies 的 aiohttp.ClientSession
+        """
+        connector, trust_env = self._create_connector()
+        return aiohttp.ClientSession(
+            headers=self.DEFAULT_HEADERS,
+            cookies=self.session.cookies.get_dict(),
+            connector=connector,
+            trust_env=trust_env,
+        )
+
+    async def crawl_comments(
+        self,
+        subject_id: str,
+        status: str = "P",
+        max_comments: int = 100,
+        session: aiohttp.ClientSession | None = None,
+    ) -> list[Comment]:
+        """分批并发爬取评论，最多爬取指定数量
 
         Args:
             subject_id: 书籍 subject-id
             status: 评论状态，P=读过，N=在读，F=想读
             max_comments: 最多爬取的评论数量（未登录时最多 100 条）
+            session: 共享的 aiohttp 会话，为空时自行创建
 
         Returns:
             评论列表（已去重）
         """
-        # 使用 dict 以评论 ID 为键去重
-        comments_dict = {}
-        start = 0  # 使用 start 参数而不是 page
+        if session is not None:
+            return await self._crawl_with_session(
+                session, subject_id, status, max_comments
+            )
+
+        async with self.create_async_session() as own_session:
+            return await self._crawl_with_session(
+                own_session, subject_id, status, max_comments
+            )
+
+    async def _crawl_with_session(
+        self,
+        session: aiohttp.ClientSession,
+        subject_id: str,
+        status: str,
+        max_comments: int,
+    ) -> list[Comment]:
+        """使用给定的 aiohttp 会话爬取评论，参数同 crawl_comments"""
+        # ck 参数在各页之间保持不变，只计算一次
+        ck_value = self._extract_ck_from_cookies()
+        ck_param = f"&ck={ck_value}" if ck_value else ""
 
-        while len(comments_dict) < max_comments:
-            try:
-                # 计算当前页码（用于显示）
-                page = (start // 20) + 1 if start > 0 else 1
-
-                # 构建 URL，使用实际的 start 值
-                if start == 0:
-                    # 第一页不需要 start 参数
-                    url = self.build_comment_url(subject_id, page=1, status=status)
-                else:
-                    # 使用实际的 start 值
-                    base_url = f"{self.BASE_URL}/subject/{subject_id}/comments/"
-                    ck_value = self._extract_ck_from_cookies()
-                    ck_param = f"&ck={ck_value}" if ck_value else ""
-                    url = f"{base_url}?percent_type=&start={start}&limit=20&status={status}&sort=score&comments_only=1{ck_param}"
-
-                # 构建 referer
-                if start == 0:
-                    referer = f"{self.BASE_URL}/subject/{subject_id}/comments/?limit=20&status={status}&sort=score"
-                else:
-                    referer = f"{self.BASE_URL}/subject/{subject_id}/comments/?start={start}&limit=20&status={status}&sort=score"
-
-                headers = self.DEFAULT_HEADERS.copy()
-                headers["Referer"] = referer
-
-                response = self.get(url, headers=headers)
-                response.raise_for_status()
-                result = response.json()
-
-                if result.get("r") != 0:
-                    print(f"获取第 {page} 页失败: {result}")
+        seen_ids = set()
+        comments_list = []
+        next_start = 0
+        # 每次并发请求至多 MAX_CONCURRENCY 页，一批结束后再判断是否继续
+        while len(comments_list) < max_comments:
+            remaining_pages = -(-(max_comments - len(comments_list)) // 20)
+            offsets = [
+                next_start + i * 20
+                for i in range(min(self.MAX_CONCURRENCY, remaining_pages))
+            ]
+            tasks = [
+                self._fetch_comments_json(
+                    session,
+                    self.build_comment_url(subject_id, start, status, ck_param),
+                    self.build_comment_referer(subject_id, start, status),
+                    start,
+                )
+                for start in offsets
+            ]
+            # 单页抛出的异常作为结果返回，不影响同批其它页和其它状态的爬取
+            results = await asyncio.gather(*tasks, return_exceptions=True)
+
+            # 按页顺序合并结果，遇到失败或没有更多评论时停止爬取
+            finished = False
+            window_new_count = 0
+            for start, result in zip(offsets, results, strict=True):
+                page = (start // 20) + 1
+                if result is None:
+                    print(f"[{status}] 第 {page} 页多次重试仍失败，停止爬取")
+                    finished = True
                     break
 
-                html_content = result.get("html", "")
-                if not html_content:
-                    print(f"第 {page} 页没有更多评论")
+                try:
+                    if isinstance(result, BaseException):
+                        raise result
+
+                    if result.get("r") != 0:
+                        print(f"[{status}] 获取第 {page} 页失败: {result}")
+                        finished = True
+                        break
+
+                    html_content = result.get("html", "")
+                    if not html_content:
+                        print(f"[{status}] 第 {page} 页没有更多评论")
+                        finished = True
+                        break
+
+                    comments = self.parse_comments_from_html(html_content)
+                except Exception as e:
+                    # 出错时保留已爬取的评论
+                    print(f"[{status}] 爬取第 {page} 页（start={start}）时出错: {e}")
+                    finished = True
                     break
 
-                comments = self.parse_comments_from_html(html_content)
                 if not comments:
-                    print(f"第 {page} 页解析到 0 条评论，停止爬取")
+                    print(f"[{status}] 第 {page} 页解析到 0 条评论，停止爬取")
+                    finished = True
                     break
 
-                # 使用评论 ID 去重（对所有排序方式都生效）
+                # 使用评论 ID 去重（对所有排序方式都生效），页之间的重叠也由此去除
                 new_count = 0
                 for comment in comments:
-                    comment_id = comment.get("comment_id", "")
-                    if comment_id and comment_id not in comments_dict:
-                        comments_dict[comment_id] = comment
+                    if comment.comment_id not in seen_ids:
+                        seen_ids.add(comment.comment_id)
+                        comments_list.append(comment)
                         new_count += 1
+                window_new_count += new_count
 
                 print(
-                    f"已爬取第 {page} 页（start={start}），获得 {len(comments)} 条评论（新增 {new_count} 条），总计 {len(comments_dict)} 条"
+                    f"[{status}] 已爬取第 {page} 页（start={start}），获得 {len(comments)} 条评论（新增 {new_count} 条），总计 {len(comments_list)} 条"
                 )
 
-                # 如果实际返回的评论数为 0，说明没有更多评论
-                if len(comments) == 0:
-                    print("没有更多评论，停止爬取")
-                    break
-
-                # start 的计算：
+                # 下一批的 start：
                 # - 如果实际返回的评论数 = 20，则 start += 20（正常情况）
                 # - 如果实际返回的评论数 < 20，则 start += 实际数量（避免跳过评论）
-                # 去重不影响 start 的计算，只是用来避免重复保存
-                if len(comments) < 20:
-                    start += len(comments)
-                else:
-                    start += 20
+                next_start = start + min(len(comments), 20)
 
                 # 限制最多爬取 max_comments 条
-                if len(comments_dict) >= max_comments:
+                if len(comments_list) >= max_comments:
+                    finished = True
                     break
 
-            except Exception as e:
-                print(f"爬取第 {page} 页（start={start}）时出错: {e}")
+            if finished:
+                break
+
+            # 整批都是已爬取过的评论，说明服务器不再返回新内容
+            if window_new_count == 0:
+                print(f"[{status}] 本批没有新增评论，停止爬取")
                 break
 
-        return list(comments_dict.values())
+        return comments_list
 
-    def save_to_csv(self, comments: list[dict], filename: str) -> None:
+    def save_to_csv(self, comments: list[Comment], filename: str) -> None:
         """将评论保存为 CSV 文件
 
         Args:
@@ -468,27 +730,10 @@ class DoubanCommentCrawler:
         ]
 
         with open(filename, "w", newline="", encoding="utf-8") as csvfile:
-            writer = csv.DictWriter(csvfile, fieldnames=fieldnames)
-            writer.writeheader()
-
-            for comment in comments:
-                vote_count = comment.get("vote_count", "")
-                # 将 vote_count 转换为字符串
-                if vote_count == "":
-                    vote_count = ""
-                else:
-                    vote_count = str(vote_count)
-
-                row = {
-                    "comment_id": comment.get("comment_id", ""),
-                    "user": comment.get("user", ""),
-                    "content": comment.get("content", ""),
-                    "rating": comment.get("rating", ""),
-                    "time": comment.get("time", ""),
-                    "location": comment.get("location", ""),
-                    "vote_count": vote_count,
-                }
-                writer.writerow(row)
+            writer = csv.writer(csvfile)
+            writer.writerow(fieldnames)
+            # 按列顺序取出评论属性，逐行写入
+            writer.writerows(map(attrgetter(*fieldnames), comments))
 
         print(f"已保存 {len(comments)} 条评论到 {filename}")
 
@@ -502,14 +747,13 @@ class DoubanCommentCrawler:
             清理后的文件名
         """
         # 移除或替换不合法字符
-        invalid_chars = r'[<>:"/\\|?*]'
-        text = re.sub(invalid_chars, "_", text)
+        text = _INVALID_FN_RE.sub("_", text)
         # 移除首尾空格和点
         text = text.strip(" .")
         return text
 
 
-def main():
+async def main():
     parser = argparse.ArgumentParser(description="豆瓣读书评论区爬虫")
     parser.add_argument(
         "subject_id",
@@ -538,8 +782,9 @@ def main():
         print(f"{status_names.get(status, status)}: {count} 条")
     print()
 
-    # 分别爬取三类评论
-    for status, count in comment_counts.items():
+    async def crawl_one(
+        session: aiohttp.ClientSession, status: str, count: int
+    ) -> None:
         status_name = status_names.get(status, status)
         print(f"\n开始爬取 {status_name} 评论...")
 
@@ -551,8 +796,8 @@ def main():
             max_comments = min(count, 100)
             print(f"未登录，最多爬取 {max_comments} 条评论")
 
-        comments = crawler.crawl_comments(
-            args.subject_id, status=status, max_comments=max_comments
+        comments = await crawler.crawl_comments(
+            args.subject_id, status=status, max_comments=max_comments, session=session
         )
 
         if comments:
@@ -570,6 +815,15 @@ def main():
         else:
             print(f"未获取到 {status_name} 评论")
 
+    # 三类评论并发爬取，共用同一个连接池
+    async with crawler.create_async_session() as session:
+        await asyncio.gather(
+            *[
+                crawl_one(session, status, count)
+                for status, count in comment_counts.items()
+            ]
+        )
+
 
 if __name__ == "__main__":
-    main()
+    asyncio.run(main())